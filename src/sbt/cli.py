@@ -1,18 +1,20 @@
 """CLI interface of sbt """
 from __future__ import annotations
 
+import re
+
 import click
 
 from sbt.submit import run_sbatch, save_script
 
+_ARG_RE = re.compile(r"--([^=]+)=(.*)", re.DOTALL)
+
 
 def _parse_arg(arg: str) -> tuple[str, str]:
-    if not arg.startswith("--"):
-        raise ValueError("Only '--key=value' is acceptable as an additional argument")
-    splitted = arg[2:].split("=")
-    if len(splitted) != 2:
+    match = _ARG_RE.fullmatch(arg)
+    if match is None:
         raise ValueError("Only '--key=value' is acceptable as an additional argument")
-    key, value = splitted
+    key, value = match.group(1, 2)
     return key.replace("-", "_"), value
 
 
@@ -31,7 +33,7 @@ def cli(
     yes: bool,
     overwrite: bool,
 ) -> None:
-    additional_args = {kv[0]: kv[1] for kv in map(_parse_arg, context.args)}
+    additional_args = dict(map(_parse_arg, context.args))
     for script_path in save_script(
         config_file_name=config_path,
         cli_options=additional_args,
@@ -0,0 +1,10 @@
+"""Compatibility helpers for different Python versions."""
+import sys
+from typing import Dict
+
+# Slotted instances don't carry a __dict__, so they are smaller and their
+# attributes are faster to read. Python < 3.10 just falls back to dicts.
+# Use it as @dataclass(**SLOTS) to keep the real decorator for type checkers.
+SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+__all__ = ["SLOTS"]
@@ -1,21 +1,119 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import itertools
+import os
 import re
+import stat
+import string
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Container, Dict, Iterable, List, Optional
+from typing import AbstractSet, Any, Callable, Container, Dict, Iterable, List, Optional
 
 import jinja2
+import jinja2.bccache
 import jinja2.meta
 from serde import deserialize, field
 
+from sbt.compat import SLOTS
 from sbt.options import Options, render_options
 
 
+class _BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """Bytecode cache that only uses a directory private to the current user.
+
+    Cached bytecode is executed when loaded, so a directory that other users
+    can write to is ignored. An unwritable directory never breaks rendering."""
+
+    def _is_private(self) -> bool:
+        try:
+            st = os.stat(self.directory)
+        except OSError:
+            return False
+        return st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) & 0o077 == 0
+
+    def load_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        if self._is_private():
+            super().load_bytecode(bucket)
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            if self._is_private():
+                super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _bytecode_cache() -> Optional[jinja2.BytecodeCache]:
+    try:
+        directory = Path.home().joinpath(".cache", "sbt", "jinja")
+    except (KeyError, RuntimeError):
+        # E.g., an arbitrary uid in a container without HOME or passwd entry
+        return None
+    return _BytecodeCache(directory=directory.as_posix(), pattern="%s.cache")
+
+
+# Scripts are named by their content hash, so that one Environment can serve
+# every config and the bytecode cache can be reused across processes.
+_SCRIPTS: Dict[str, str] = {}
+_ENV = jinja2.Environment(
+    loader=jinja2.FunctionLoader(_SCRIPTS.get),
+    auto_reload=False,
+    # sbt is a short-lived process, so keep compiled scripts on disk as well
+    bytecode_cache=_bytecode_cache(),
+)
+
+
+def _get_template(script: str) -> jinja2.Template:
+    name = hashlib.blake2b(script.encode("utf-8"), digest_size=16).hexdigest()
+    # The loader only needs the source while the template is compiled
+    _SCRIPTS[name] = script
+    try:
+        return _ENV.get_template(name)
+    finally:
+        del _SCRIPTS[name]
+
+
+@functools.lru_cache(maxsize=32)
+def _read_template(path: str, mtime_ns: int, size: int) -> str:
+    # mtime_ns and size are only cache keys to detect modified templates
+    # read_bytes skips the TextIOWrapper that read_text sets up
+    return Path(path).read_bytes().decode("utf-8")
+
+
+_JINJA_MARKERS = ("{{", "{%", "{#")
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+_TIMESTAMP = "{{ SBT_TIMESTAMP }}"
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_script(script: str, timestamp: bool) -> Callable[[dict[str, Any]], str]:
+    # Only the first placeholder can be the one render() inserted into the header
+    head, _, tail = script.partition(_TIMESTAMP) if timestamp else (script, "", "")
+    if any(marker in head or marker in tail for marker in _JINJA_MARKERS):
+        return _get_template(script).render
+    # A script without any jinja syntax other than the timestamp placeholder
+    # needs no compilation. Jinja would only substitute the timestamp,
+    # normalize newlines and drop a trailing one.
+    rendered = _NEWLINE_RE.sub("\n", script)
+    if rendered.endswith("\n"):
+        rendered = rendered[:-1]
+    if not timestamp:
+        return lambda _variables: rendered
+    head, _, tail = rendered.partition(_TIMESTAMP)
+    return lambda variables: head + str(variables["SBT_TIMESTAMP"]) + tail
+
+
+@functools.lru_cache(maxsize=128)
+def _undeclared_variables(script: str) -> frozenset[str]:
+    return frozenset(jinja2.meta.find_undeclared_variables(_ENV.parse(script)))
+
+
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Config:
     logdir: Path = field(default_factory=lambda: Path("."))
     slurm_options: Options = field(default_factory=Options)
@@ -38,53 +136,62 @@ class Config:
     def is_overriden(self, key: str, cli_args: Container[str]) -> bool:
         return key in self.matrix or key in cli_args
 
-    def get_environment(
-        self,
-        header: str,
-        basedir: Path,
-    ) -> tuple[str, jinja2.Environment]:
+    def get_script(self, header: str, basedir: Path) -> str:
         if self.template_path is not None:
-            if self.template_path.is_absolute():
-                template = self.template_path.read_text()
-            else:
-                template = basedir.joinpath(self.template_path).read_text()
+            # joinpath leaves an absolute template_path as it is
+            template_path = basedir.joinpath(self.template_path).as_posix()
+            st = os.stat(template_path)
+            template = _read_template(template_path, st.st_mtime_ns, st.st_size)
         else:
             assert self.template is not None
             template = self.template
-        script = header + template
-        loader = jinja2.DictLoader({"script": script})
-        return script, jinja2.Environment(loader=loader)
+        return header + template
 
     def variables_iter(self, overrides: dict[str, Any]) -> Iterable[dict[str, Any]]:
         iterated = {k: v for k, v in self.matrix.items() if k not in overrides}
+        base = {**self.default_values, **overrides}
         if len(iterated) == 0:
-            yield {**self.default_values, **overrides}
+            yield base
         else:
+            keys = tuple(iterated)
             for matrix_vars in itertools.product(*iterated.values()):
-                variables = {**self.default_values, **overrides}
-                for key, value in zip(iterated, matrix_vars):
-                    variables[key] = value
+                variables = base.copy()
+                variables.update(zip(keys, matrix_vars))
                 yield variables
 
 
+class _JobNameTable(Dict[int, int]):
+    """str.translate table that replaces characters other than [A-Za-z0-9|_-]
+    with '-'. Other characters are added on their first lookup."""
+
+    def __missing__(self, codepoint: int) -> int:
+        self[codepoint] = ord("-")
+        return ord("-")
+
+
+_JOB_NAME_TABLE = _JobNameTable(
+    (ord(c), ord(c)) for c in string.ascii_letters + string.digits + "|_-"
+)
+
+
 def _render_kv(k: str, v: Any) -> str:
-    return re.sub(r"[^A-Za-z0-9|_-]", "-", f"{k}-{v}")
+    return f"{k}-{v}".translate(_JOB_NAME_TABLE)
 
 
 def _override_name(overrides: dict[str, Any]) -> str:
     if len(overrides) == 0:
         return "default"
     else:
-        return "-".join([_render_kv(*kv) for kv in overrides.items()])
+        return "-".join(itertools.starmap(_render_kv, overrides.items()))
 
 
-def _prompt(env: jinja2.Environment, script: str, variables: Iterable[str]) -> bool:
+def _prompt(template_variables: frozenset[str], variables: Iterable[str]) -> bool:
     from rich import markup
     from rich import print as rich_print
     from rich.prompt import Confirm
     from rich.text import Text
 
-    def variables_text(diff: set[str]) -> Text:
+    def variables_text(diff: AbstractSet[str]) -> Text:
         diff_list = list(diff)
         if len(diff_list) == 1:
             return markup.render(f"Variable [r]{diff_list[0]}[/r]")
@@ -96,7 +203,6 @@ def _prompt(env: jinja2.Environment, script: str, variables: Iterable[str]) -> b
             )
             return markup.render(f"Variables [r]{variables}[/r] ")
 
-    template_variables = jinja2.meta.find_undeclared_variables(env.parse(script))
     given_variables = set(variables)
     diff_t_g = template_variables.difference(given_variables)
     diff_g_t = given_variables.difference(template_variables)
@@ -124,29 +230,37 @@ def render(
     show_prompt: bool = False,
     no_timestamp: bool = False,  # Only for testing
 ) -> Iterable[tuple[str, str]]:
+    # Timestamp is given as a variable so that the compiled script is reusable
+    if no_timestamp:
+        timestamp_line, timestamp = "", {}
+    else:
+        timestamp_line = f"# timestamp: {_TIMESTAMP}\n"
+        timestamp = {"SBT_TIMESTAMP": datetime.now().isoformat()}
     # Render sbatch header
     options = render_options(config.slurm_options)
-    script = config.shebang + options
-    # Timestamp
-    if not no_timestamp:
-        script += f"# timestamp: {datetime.now().isoformat()}\n"
-    script, env = config.get_environment(script, self_path.parent)
+    header = "".join((config.shebang, options, timestamp_line))
+    script = config.get_script(header, self_path.parent)
+    render_script = _compile_script(script, not no_timestamp)
+    # Log file names are built with str concatenation instead of Path.joinpath
+    log_prefix = config.logdir.absolute().as_posix().rstrip("/") + "/"
+    # Variables in the script don't change over the matrix
+    template_variables = _undeclared_variables(script) if show_prompt else frozenset()
     for variables in config.variables_iter(cli_options):
         # Make a unique job name and out/err file names
         overrides = {
             k: v for k, v in variables.items() if config.is_overriden(k, cli_options)
         }
         job_name = self_path.stem + "-" + _override_name(overrides=overrides)
-        logdir = config.logdir.absolute()
         variables.update(
             {
                 "SBT_JOB_NAME": job_name,
-                "SBT_LOGFILE_NAME": logdir.joinpath(job_name).as_posix(),
+                "SBT_LOGFILE_NAME": log_prefix + job_name,
+                **timestamp,
             }
         )
 
-        if show_prompt and not _prompt(env, script, variables.keys()):
+        if show_prompt and not _prompt(template_variables, variables.keys()):
             exit(0)
 
         # Render variables in the script
-        yield env.get_template("script").render(variables), job_name
+        yield render_script(variables), job_name
@@ -6,7 +6,7 @@ import operator
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List, Optional, Tuple, Union
+from typing import Any, Callable, List, Optional, Tuple, Union, get_type_hints
 
 from serde.compat import dataclasses
 
@@ -17,11 +17,11 @@ else:
 
 from serde import deserialize, field
 
-from sbt.render_helper import is_empty, render_optional
+from sbt.compat import SLOTS
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class AcctgFreq:
     datatype: Literal["task", "energy", "network", "filesystem"]
     interval: int
@@ -31,7 +31,7 @@ class AcctgFreq:
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Array:
     values: List[int] = field(default_factory=list)
     range_: List[int] = field(default_factory=list, rename="range")
@@ -51,21 +51,17 @@ class Array:
             )
 
     def as_sbatch_str(self) -> str:
-        rlen = len(self.range_)
-        if rlen == 0:
-            ret = ",".join([str(value) for value in self.values])
+        if self.range_:
+            step = f":{self.range_[2]}" if len(self.range_) == 3 else ""
+            indices = f"{self.range_[0]}-{self.range_[1]}{step}"
         else:
-            a, b = self.range_[:2]
-            ret = f"{a}-{b}"
-            if rlen == 3:
-                ret += f":{self.range_[2]}"
-        if self.max_parallel is not None:
-            ret += f"%{self.max_parallel}"
-        return ret
+            indices = ",".join(map(str, self.values))
+        max_parallel = "" if self.max_parallel is None else f"%{self.max_parallel}"
+        return f"{indices}{max_parallel}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class ClusterConstraint:
     features: List[str]
     exclude: bool = False
@@ -79,7 +75,7 @@ class ClusterConstraint:
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class CpuFreq:
     p1: Union[int, Literal["low", "medium", "high", "highm1"]]
     p2: Union[int, Literal["medium", "high", "highm1"], None] = None
@@ -99,15 +95,13 @@ class CpuFreq:
             raise ValueError("Invalid cpu freq: p3 is specified without p2")
 
     def as_sbatch_str(self) -> str:
-        return (
-            str(self.p1)
-            + render_optional(self.p2, prefix="-")
-            + render_optional(self.p3, prefix=":")
-        )
+        p2 = f"-{self.p2}" if self.p2 else ""
+        p3 = f":{self.p3}" if self.p3 else ""
+        return f"{self.p1}{p2}{p3}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Distribution:
     first: Union[Literal["block", "cycle", "arbitary"], int]
     second: Optional[Literal["block", "cyclic", "fcyclic"]] = None
@@ -119,16 +113,14 @@ class Distribution:
             raise ValueError("Invalid distribution: third is specified without second")
 
     def as_sbatch_str(self) -> str:
-        return (
-            str(self.first)
-            + render_optional(self.second, prefix=":")
-            + render_optional(self.third, prefix=":")
-            + {True: ",{Pack}", False: ""}[self.pack]
-        )
+        second = f":{self.second}" if self.second else ""
+        third = f":{self.third}" if self.third else ""
+        pack = ",{Pack}" if self.pack else ""
+        return f"{self.first}{second}{third}{pack}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Duration:
     days: int = 0
     hours: int = 0
@@ -139,14 +131,12 @@ class Duration:
             raise ValueError("Zero duration")
 
     def as_sbatch_str(self) -> str:
-        if self.days == 0:
-            return f"{self.hours:02}:{self.minutes:02}:00"
-        else:
-            return f"{self.days}-{self.hours:02}:{self.minutes:02}:00"
+        days = f"{self.days}-" if self.days else ""
+        return f"{days}{self.hours:02}:{self.minutes:02}:00"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class GpuBind:
     type_: Literal[
         "closest",
@@ -160,48 +150,44 @@ class GpuBind:
     verbose: bool = False
 
     def as_sbatch_str(self) -> str:
-        ret = str(self.type_)
-        if self.value is not None:
-            if isinstance(self.value, list):
-                ret += ":" + ",".join(self.value)
-            else:
-                ret += f":{self.value}"
-        if self.verbose:
-            ret = f"verbose,{ret}"
-        return ret
+        verbose = "verbose," if self.verbose else ""
+        if self.value is None:
+            value = ""
+        elif isinstance(self.value, list):
+            value = ":" + ",".join(self.value)
+        else:
+            value = f":{self.value}"
+        return f"{verbose}{self.type_}{value}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class GpuFreq:
     value: Union[int, Literal["low", "medium", "high", "highm1"]]
     memory: Union[int, Literal["low", "medium", "high", "highm1"], None] = None
     verbose: bool = False
 
     def as_sbatch_str(self) -> str:
-        ret = str(self.value) + render_optional(self.memory, prefix=",memory=")
-        if self.verbose:
-            ret += ",verbose"
-        return ret
+        memory = f",memory={self.memory}" if self.memory else ""
+        verbose = ",verbose" if self.verbose else ""
+        return f"{self.value}{memory}{verbose}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class License:
     name: str
     db: str = ""
     count: Optional[int] = None
 
     def as_sbatch_str(self) -> str:
-        return (
-            self.name
-            + render_optional(self.db, prefix="@")
-            + render_optional(self.count, prefix="")
-        )
+        db = f"@{self.db}" if self.db else ""
+        count = f":{self.count}" if self.count else ""
+        return f"{self.name}{db}{count}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Mem:
     size: int
     unit: Literal["K", "M", "G", "T"] = "M"
@@ -211,31 +197,30 @@ class Mem:
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Signal:
     num: Union[str, int]
     time: int = 60
     option: Optional[Literal["R", "B"]] = None
 
     def as_sbatch_str(self) -> str:
-        return render_optional(self.option, suffix=":") + f"{self.num}@{self.time}"
+        option = f"{self.option}:" if self.option else ""
+        return f"{option}{self.num}@{self.time}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Switches:
     count: int
     max_time: Optional[Duration] = None
 
-    def as_sbatch_str(self):
-        if self.max_time is None:
-            return str(self.count)
-        else:
-            return f"{self.count}@{self.max_time.as_sbatch_str()}"
+    def as_sbatch_str(self) -> str:
+        max_time = "" if self.max_time is None else f"@{self.max_time.as_sbatch_str()}"
+        return f"{self.count}{max_time}"
 
 
 @deserialize
-@dataclass
+@dataclass(**SLOTS)
 class Options:
     """
     Sbatch options.
@@ -389,21 +374,23 @@ class Options:
     wckey: str = ""
 
 
+def _gpu_to_s(value: int | tuple[str, int]) -> str:
+    if isinstance(value, tuple):
+        return f"{value[0]}:{value[1]}"
+    else:
+        return str(value)
+
+
 def _render_gpus(gpus: list[int | tuple[str, int]]) -> str:
-    def to_s(value: int | tuple[str, int]) -> str:
-        if isinstance(value, tuple):
-            return f"{value[0]}:{value[1]}"
-        else:
-            return str(value)
+    return "=" + ",".join(map(_gpu_to_s, gpus))
 
-    return "=" + ",".join([to_s(elem) for elem in gpus])
 
+def _gres_to_s(value: tuple[str, int] | tuple[str, str, int]) -> str:
+    return ":".join(map(str, value))
 
-def _render_gres(gres: list[tuple[str, int] | tuple[str, str, int]]) -> str:
-    def to_s(value: tuple[str, int] | tuple[str, str, int]) -> str:
-        return ":".join([str(elem) for elem in value])
 
-    return "=" + ",".join([to_s(elem) for elem in gres])
+def _render_gres(gres: list[tuple[str, int] | tuple[str, str, int]]) -> str:
+    return "=" + ",".join(map(_gres_to_s, gres))
 
 
 def _render_no_kill(no_kill: bool | Literal["off"]) -> str:
@@ -421,7 +408,7 @@ def _render_nodes(nodes: int | tuple[int, int]) -> str:
 
 
 _CUSTOM_RENDER_FUNCTIONS = {
-    "extra_node_info": (lambda value: ":".join([str(elem) for elem in value])),
+    "extra_node_info": (lambda value: ":".join(map(str, value))),
     "gpus": _render_gpus,
     "gpus_per_node": _render_gpus,
     "gpus_per_task": _render_gpus,
@@ -436,29 +423,115 @@ def _render_key(key: str) -> str:
     return "--" + key.replace("_", "-")
 
 
-def _render_value(key: str, value: Any) -> str:
-    if key in _CUSTOM_RENDER_FUNCTIONS:
-        return _CUSTOM_RENDER_FUNCTIONS[key](value)
-    elif hasattr(value, "as_sbatch_str"):
+# Option types that know how to render themselves
+_SBATCH_TYPES = frozenset(
+    {
+        AcctgFreq,
+        Array,
+        ClusterConstraint,
+        CpuFreq,
+        Distribution,
+        Duration,
+        GpuBind,
+        GpuFreq,
+        License,
+        Mem,
+        Signal,
+        Switches,
+    }
+)
+
+
+_as_sbatch_str = operator.methodcaller("as_sbatch_str")
+
+
+def _to_sbatch_str(value: Any) -> str:
+    return value.as_sbatch_str() if type(value) in _SBATCH_TYPES else str(value)
+
+
+def _render_value(value: Any) -> str:
+    if type(value) in _SBATCH_TYPES:
         return "=" + value.as_sbatch_str()
     elif isinstance(value, (list, tuple)):
-        values = [
-            v.as_sbatch_str() if hasattr(v, "as_sbatch_str") else str(v) for v in value
-        ]
-        return "=" + ",".join(values)
+        return "=" + ",".join(map(_to_sbatch_str, value))
     elif isinstance(value, bool):
         return ""
     else:
         return f"={value}"
 
 
+def _render_sbatch_obj(value: Any) -> str:
+    return "=" + value.as_sbatch_str()
+
+
+def _render_sbatch_seq(value: list[Any]) -> str:
+    return "=" + ",".join(map(_as_sbatch_str, value))
+
+
+def _render_seq(value: list[Any] | tuple[Any, ...]) -> str:
+    return "=" + ",".join(map(str, value))
+
+
+def _render_flag(value: bool) -> str:
+    return ""
+
+
+def _render_scalar(value: Any) -> str:
+    return f"={value}"
+
+
+def _select_renderer(hint: Any) -> Callable[[Any], str]:
+    """Choose a value renderer from the type annotation of a field"""
+    origin = getattr(hint, "__origin__", None)
+    if origin is Union:
+        args = [arg for arg in hint.__args__ if arg is not type(None)]
+        renderers = {_select_renderer(arg) for arg in args}
+        if len(renderers) == 1:
+            return renderers.pop()
+        else:
+            # e.g. Union[str, List[str]] is dispatched by the actual value
+            return _render_value
+    elif origin in (list, tuple):
+        if hint.__args__[0] in _SBATCH_TYPES:
+            return _render_sbatch_seq
+        else:
+            return _render_seq
+    elif hint in _SBATCH_TYPES:
+        return _render_sbatch_obj
+    elif hint is bool:
+        return _render_flag
+    else:
+        return _render_scalar
+
+
+def _make_renderers() -> tuple[tuple[Callable[[Options], Any], str, Any], ...]:
+    hints = get_type_hints(Options)
+    return tuple(
+        (
+            operator.attrgetter(field.name),
+            "#SBATCH " + _render_key(field.name),
+            _CUSTOM_RENDER_FUNCTIONS.get(field.name)
+            or _select_renderer(hints[field.name]),
+        )
+        for field in dataclasses.fields(Options)
+    )
+
+
+# (getter, "#SBATCH --key", value renderer) for each field, resolved once so
+# that render_options does no reflection or type dispatch per call
+_RENDERERS = _make_renderers()
+
+
 def render_options(options: Options) -> str:
-    res = []
-    for key in map(operator.attrgetter("name"), dataclasses.fields(options)):
-        value = getattr(options, key)
-        if not is_empty(value):
-            res.append("#SBATCH " + _render_key(key) + _render_value(key, value))
-    rendered = "\n".join(res)
-    if len(res) != 0:
-        rendered = "\n" + rendered + "\n"
-    return rendered
+    # For every field type of Options (None, bool, numbers, str, sequences and
+    # option objects), falsy means the option is not given
+    res = [
+        prefix + render_value(value)
+        for getter, prefix, render_value in _RENDERERS
+        for value in (getter(options),)
+        if value
+    ]
+    if len(res) == 0:
+        return ""
+    else:
+        return "\n" + "\n".join(res) + "\n"
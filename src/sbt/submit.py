@@ -2,43 +2,51 @@
 
 from __future__ import annotations
 
+import os
+import re
 import subprocess
+import sys
 from pathlib import Path
 from typing import Iterable
 
-from rich import markup
-from rich.console import Console
-from rich.prompt import Confirm
-from rich.syntax import Syntax
-from serde.toml import from_toml
+from serde import from_dict
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    # tomli is installed by pyserde[toml]
+    import tomli as tomllib
 
 from sbt.config import Config, render
 
 
 def _nth_script(basedir: Path, script_name: str) -> int:
+    pattern = re.compile(re.escape(script_name) + r"--(\d+)\.bash")
     max_value = 0
-    for script in basedir.glob(f"{script_name}*.bash"):
-        name = script.name
-        pos = name.find("--")
-        if pos > 0:
-            max_value = max(max_value, int(name[pos + 2 :]))
+    with os.scandir(basedir) as entries:
+        for entry in entries:
+            match = pattern.fullmatch(entry.name)
+            if match is not None:
+                max_value = max(max_value, int(match.group(1)))
     return max_value
 
 
-def _save_script(
-    script: str,
-    script_name: str,
-    logdir: Path,
-    show_prompt: bool,
-    overwrite: bool,
+def _prompt_script_path(
+    script: str, script_name: str, logdir: Path, overwrite: bool
 ) -> Path:
+    # rich is slow to import, so it is imported only when sbt needs to prompt
+    from rich import markup
+    from rich.console import Console
+    from rich.prompt import Confirm
+    from rich.syntax import Syntax
+
     script_path = logdir.joinpath(f"{script_name}.bash")
     if script_path.exists():
-        if overwrite and show_prompt:
+        if overwrite:
             answer = Confirm.ask(
                 markup.render(f"{script_path.as_posix()} already exists. Overwrite it?")
             )
-        elif show_prompt:
+        else:
             nth = _nth_script(logdir, script_name)
             old_path = script_path
             script_path = logdir.joinpath(f"{script_name}--{nth + 1}.bash")
@@ -47,27 +55,44 @@ def _save_script(
                     f"{old_path.as_posix()} already exists. Create {script_path.as_posix()}?"
                 )
             )
-        else:
-            answer = True
 
         if not answer:
             exit(0)
 
+    console = Console()
+    syntax = Syntax(script, "bash")
+    console.print(syntax)
+    if not Confirm.ask(
+        f"The above script is written to {script_path.as_posix()}. Proceed?"
+    ):
+        exit(0)
+
+    return script_path
+
+
+def _save_script(
+    script: str,
+    script_name: str,
+    logdir: Path,
+    show_prompt: bool,
+    overwrite: bool,
+) -> Path:
     if show_prompt:
-        console = Console()
-        syntax = Syntax(script, "bash")
-        console.print(syntax)
-        if not Confirm.ask(
-            f"The above script is written to {script_path.as_posix()}. Proceed?"
-        ):
-            exit(0)
+        script_path = _prompt_script_path(script, script_name, logdir, overwrite)
+    else:
+        script_path = logdir.joinpath(f"{script_name}.bash")
 
     logdir.mkdir(parents=True, exist_ok=True)
-    script_path.touch()
     script_path.write_text(script)
     return script_path
 
 
+def _load_config(path: Path) -> Config:
+    # tomllib parses bytes, so the file is not decoded into a str first
+    with path.open("rb") as f:
+        return from_dict(Config, tomllib.load(f), reuse_instances=False)
+
+
 def save_script(
     config_file_name: str,
     cli_options: dict[str, str],
@@ -75,8 +100,8 @@ def save_script(
     overwrite: bool = False,
 ) -> Iterable[Path]:
     config_path = Path(config_file_name).absolute()
-    config_toml = config_path.read_text()
-    config = from_toml(Config, config_toml)
+    config = _load_config(config_path)
+    logdir = config.logdir.absolute()
     for script, script_name in render(
         self_path=config_path,
         config=config,
@@ -86,7 +111,7 @@ def save_script(
         yield _save_script(
             script,
             script_name,
-            config.logdir.absolute(),
+            logdir,
             show_prompt,
             overwrite,
         )
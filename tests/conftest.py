@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import pytest
+
+from sbt import config
+
+
+@pytest.fixture(autouse=True)
+def jinja_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep compiled scripts out of the user's cache directory."""
+    cache_dir = tmp_path.joinpath("jinja")
+    cache = config._BytecodeCache(directory=cache_dir.as_posix(), pattern="%s.cache")
+    monkeypatch.setattr(config._ENV, "bytecode_cache", cache)
+    return cache_dir
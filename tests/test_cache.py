@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import Any
+
+import jinja2
+import pytest
+
+from sbt import config
+
+
+def _environment(cache_dir: Path) -> jinja2.Environment:
+    return jinja2.Environment(
+        loader=jinja2.DictLoader({"script": "echo {{ foo }}"}),
+        bytecode_cache=config._BytecodeCache(directory=cache_dir.as_posix()),
+    )
+
+
+def test_cache_without_home(monkeypatch: pytest.MonkeyPatch) -> None:
+    def no_home() -> Path:
+        raise RuntimeError("Could not determine home directory.")
+
+    monkeypatch.setattr(Path, "home", no_home)
+    assert config._bytecode_cache() is None
+
+
+@pytest.mark.parametrize("mode, n_cached", ((0o700, 1), (0o777, 0)))
+def test_cache_directory_mode(tmp_path: Path, mode: int, n_cached: int) -> None:
+    cache_dir = tmp_path.joinpath("cache")
+    cache_dir.mkdir()
+    cache_dir.chmod(mode)
+    assert _environment(cache_dir).get_template("script").render(foo=1) == "echo 1"
+    assert len(list(cache_dir.iterdir())) == n_cached
+
+
+def test_cache_creates_private_directory(tmp_path: Path) -> None:
+    cache_dir = tmp_path.joinpath("cache")
+    _environment(cache_dir).get_template("script")
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+
+
+def test_cache_hit(jinja_cache_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    script = "#!/bin/bash\necho {{ foo }} > {{ SBT_JOB_NAME }}.log"
+    variables = {"foo": "bar", "SBT_JOB_NAME": "job"}
+    compiled = config._compile_script(script, False)(variables)
+    assert len(list(jinja_cache_dir.iterdir())) == 1
+    # Forget the in-memory templates so that the script is loaded from disk
+    config._compile_script.cache_clear()
+    assert config._ENV.cache is not None
+    config._ENV.cache.clear()
+
+    def no_compile(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("The script is compiled again")
+
+    monkeypatch.setattr(config._ENV, "compile", no_compile)
+    assert config._compile_script(script, False)(variables) == compiled
@@ -0,0 +1,15 @@
+import pytest
+
+from sbt.cli import _parse_arg
+
+
+def test_parse_arg() -> None:
+    assert _parse_arg("--foo-bar=baz") == ("foo_bar", "baz")
+    assert _parse_arg("--filter=a=b") == ("filter", "a=b")
+    assert _parse_arg("--empty=") == ("empty", "")
+
+
+@pytest.mark.parametrize("arg", ("foo=bar", "--foo", "--=bar"))
+def test_parse_invalid_arg(arg: str) -> None:
+    with pytest.raises(ValueError):
+        _parse_arg(arg)
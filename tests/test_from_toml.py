@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 from serde import SerdeError
 from serde.toml import from_toml
@@ -24,6 +26,23 @@ partition = "gpu"
     assert config.slurm_options.partition == "gpu"
 
 
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="slots=True needs 3.10")
+def test_slotted_dataclasses() -> None:
+    toml = r"""
+logdir = "/tmp/log"
+
+template = "echo {{ var }}"
+
+[slurm_options]
+mem = {size = 128, unit = "G"}
+"""
+    config = from_toml(Config, toml)
+    assert not hasattr(config, "__dict__")
+    assert not hasattr(config.slurm_options, "__dict__")
+    assert config.slurm_options.mem is not None
+    assert not hasattr(config.slurm_options.mem, "__dict__")
+
+
 def test_value_array() -> None:
     toml = r"""
     account = "me"
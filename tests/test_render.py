@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import jinja2
 import pytest
 from serde.toml import from_toml
 
-from sbt.config import Config, render
-from sbt.options import Duration, Mem, Options, render_options
+from sbt.config import Config, _compile_script, render
+from sbt.options import Duration, License, Mem, Options, render_options
 
 
 def test_render_options() -> None:
@@ -41,6 +42,11 @@ def test_render_options() -> None:
     assert rendered == expected
 
 
+def test_render_licenses() -> None:
+    options = Options(licenses=[License("foo", "db", 3), License("bar")])
+    assert "\n#SBATCH --licenses=foo@db:3,bar\n" in render_options(options)
+
+
 @pytest.mark.parametrize("var", ("Yay", 10))
 def test_render_config(var: str | int) -> None:
     toml = r"""
@@ -154,3 +160,64 @@ bar = ["oh", "no"]
 echo {foo} && echo {bar}"""
         assert rendered == expected, rendered
         assert jobname == f"{name}-foo-{foo}-bar-{bar}"
+
+
+def test_render_constant_template() -> None:
+    toml = r"""
+logdir = "/tmp/log"
+
+template = "echo constant\r\necho template\n"
+
+[slurm_options]
+error = "/tmp/log/constant.err"
+job_name = "constant"
+output = "/tmp/log/constant.out"
+"""
+    config = from_toml(Config, toml)
+    rendered, jobname = next(
+        iter(render(Path("myjob.toml"), config, {}, no_timestamp=True))
+    )
+    expected = r"""#!/bin/bash -l
+#SBATCH --error=/tmp/log/constant.err
+#SBATCH --job-name=constant
+#SBATCH --output=/tmp/log/constant.out
+echo constant
+echo template"""
+    assert rendered == expected, rendered
+    assert jobname == "myjob-default"
+
+
+@pytest.mark.parametrize("template", ("echo constant", "echo {{ 'jinja' }}"))
+def test_render_timestamp(template: str) -> None:
+    slurm_options = Options(error="job.err", job_name="job", output="job.out")
+    config = Config(slurm_options=slurm_options, template=template)
+    rendered, _ = next(iter(render(Path("myjob.toml"), config, {})))
+    *header, timestamp, echo = rendered.split("\n")
+    assert header == [
+        "#!/bin/bash -l",
+        "#SBATCH --error=job.err",
+        "#SBATCH --job-name=job",
+        "#SBATCH --output=job.out",
+    ]
+    assert timestamp.startswith("# timestamp: 20")
+    assert echo in ("echo constant", "echo jinja")
+
+
+def test_render_timestamp_in_template() -> None:
+    config = Config(shebang="#!/bin/sh", template="echo {{ SBT_TIMESTAMP }}")
+    rendered, _ = next(iter(render(Path("myjob.toml"), config, {}, no_timestamp=True)))
+    assert rendered.endswith("\necho ")
+
+
+@pytest.mark.parametrize(
+    "template, is_compiled",
+    (("echo constant", False), ("echo {{ 'jinja' }}", True)),
+)
+def test_compile_script(template: str, is_compiled: bool) -> None:
+    script = f"#!/bin/bash -l\n# timestamp: {{{{ SBT_TIMESTAMP }}}}\n{template}"
+    render_script = _compile_script(script, True)
+    # Only scripts with jinja syntax other than the timestamp are compiled
+    compiled = isinstance(getattr(render_script, "__self__", None), jinja2.Template)
+    assert compiled == is_compiled
+    rendered = render_script({"SBT_TIMESTAMP": "now"})
+    assert rendered.startswith("#!/bin/bash -l\n# timestamp: now\necho ")
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from sbt.submit import _nth_script, save_script
+
+
+def test_nth_script(tmp_path: Path) -> None:
+    assert _nth_script(tmp_path, "job") == 0
+    for name in ("job.bash", "job--2.bash", "job-x--7.bash", "job--a.bash"):
+        tmp_path.joinpath(name).touch()
+    assert _nth_script(tmp_path, "job") == 2
+
+
+def test_save_script(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    toml = r"""
+logdir = "log"
+template = "echo {{ var }}"
+
+[slurm_options]
+partition = "gpu"
+
+[matrix]
+var = [1, 2]
+"""
+    config_path = tmp_path.joinpath("myjob.toml")
+    config_path.write_text(toml)
+    paths = list(save_script(config_path.as_posix(), {}))
+    assert all(path.parent == tmp_path.joinpath("log") for path in paths)
+    assert [path.name for path in paths] == ["myjob-var-1.bash", "myjob-var-2.bash"]
+    script = paths[0].read_text()
+    assert "#SBATCH --partition=gpu\n" in script
+    assert script.endswith("\necho 1")
+    # Edits to the config are reflected in the next call
+    config_path.write_text(toml.replace("gpu", "cpu"))
+    paths = list(save_script(config_path.as_posix(), {"var": "3"}))
+    assert [path.name for path in paths] == ["myjob-var-3.bash"]
+    assert "#SBATCH --partition=cpu\n" in paths[0].read_text()